@@ -0,0 +1,114 @@
+"""
+sleep_core のマイクロベンチマーク
+
+MediaPipe やカメラを使わず、乱数で作った入力で判定コアを回して速度を測る。
+
+使い方:
+    python benchmark_sleep_core.py [--steps N] [--feeds N] [--seed N]
+
+引数:
+    --steps: 1検出器あたりのステップ数（default=10000）
+    --feeds: バッチ版で同時に進める検出器（カメラ映像）の数（default=1000）
+    --seed: 入力生成の乱数シード（default=0）
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from sleep_core import SleepCore, SleepCoreBatch
+
+FRAME_INTERVAL = 1.0 / 30.0  # 30fps 相当の時間刻み
+
+
+def make_inputs(steps, feeds, seed):
+    """
+    (timestamps, face_present, left_blink, right_blink) を生成する
+
+    blink値は閉眼側に偏らせ、顔の未検出もまれにして、
+    ゲージが最大値に達して Stage1 / Stage2 の判定まで進むようにする。
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(steps, dtype=np.float64) * FRAME_INTERVAL
+    face_present = rng.random((steps, feeds)) < 0.995
+    left_blink = rng.random((steps, feeds)) ** 0.2
+    right_blink = rng.random((steps, feeds)) ** 0.2
+    return timestamps, face_present, left_blink, right_blink
+
+
+def bench_scalar(timestamps, face_present, left_blink, right_blink):
+    core = SleepCore()
+    ts = timestamps.tolist()
+    faces = face_present[:, 0].tolist()
+    lefts = left_blink[:, 0].tolist()
+    rights = right_blink[:, 0].tolist()
+
+    step = core.step
+    start = time.perf_counter()
+    for t, f, l, r in zip(ts, faces, lefts, rights):
+        step(t, f, l, r)
+    return time.perf_counter() - start
+
+
+def bench_batch(timestamps, face_present, left_blink, right_blink):
+    batch = SleepCoreBatch(face_present.shape[1])
+
+    step = batch.step
+    start = time.perf_counter()
+    for i in range(len(timestamps)):
+        step(timestamps[i], face_present[i], left_blink[i], right_blink[i])
+    return time.perf_counter() - start
+
+
+def check_consistency(timestamps, face_present, left_blink, right_blink, feeds=8):
+    """
+    バッチ版が各列についてスカラー版と同じ結果になるか確認する
+
+    Returns:
+        tuple: (Stage1 の回数, Stage2 の回数)
+    """
+    feeds = min(feeds, face_present.shape[1])
+    cores = [SleepCore() for _ in range(feeds)]
+    batch = SleepCoreBatch(feeds)
+    stage1_hits = 0
+    stage2_hits = 0
+
+    for i, t in enumerate(timestamps.tolist()):
+        gauge, stage1, stage2, status, final_elapsed = batch.step(
+            t, face_present[i, :feeds], left_blink[i, :feeds], right_blink[i, :feeds]
+        )
+        for j, core in enumerate(cores):
+            g, s1, s2, st, fe = core.step(
+                t, bool(face_present[i, j]), float(left_blink[i, j]), float(right_blink[i, j])
+            )
+            if (g, s1, s2, st, fe) != (gauge[j], stage1[j], stage2[j], status[j], final_elapsed[j]):
+                raise AssertionError(f"mismatch at step {i}, feed {j}")
+            stage1_hits += s1
+            stage2_hits += s2
+
+    return stage1_hits, stage2_hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="睡眠判定コアのマイクロベンチマーク")
+    parser.add_argument("--steps", type=int, default=10000, help="1検出器あたりのステップ数 (default=10000)")
+    parser.add_argument("--feeds", type=int, default=1000, help="バッチ版の検出器の数 (default=1000)")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード (default=0)")
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.steps, args.feeds, args.seed)
+    stage1_hits, stage2_hits = check_consistency(*(x[:min(args.steps, 10000)] for x in inputs))
+    print(f"consistency: OK (stage1 {stage1_hits:,} / stage2 {stage2_hits:,})")
+
+    elapsed = bench_scalar(*inputs)
+    print(f"SleepCore      : {args.steps:>12,} steps  {elapsed:8.3f}s  {args.steps / elapsed:>14,.0f} steps/s")
+
+    total = args.steps * args.feeds
+    elapsed = bench_batch(*inputs)
+    print(f"SleepCoreBatch : {total:>12,} steps  {elapsed:8.3f}s  {total / elapsed:>14,.0f} steps/s"
+          f"  ({args.feeds} feeds)")
+
+
+if __name__ == "__main__":
+    main()
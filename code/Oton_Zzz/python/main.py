@@ -6,7 +6,8 @@ import mediapipe as mp
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../utils"))
-from serial_comm import Serialize_controler
+from device_hub import DeviceHub
+from sleep_core import SleepCore, format_status
 
 class SleepDetector:
     """
@@ -42,10 +43,15 @@ class SleepDetector:
         self.GAUGE_DECREASE_RATE = gauge_decrease_rate
         self.FINAL_CONFIRMATION_TIME = final_confirmation_time
 
-        # --- 状態管理変数 ---
-        self.sleep_gauge = 0.0
-        self.last_update_time = time.time()
-        self.final_confirmation_start_time = None
+        # --- 判定コア（MediaPipeに依存しない状態管理） ---
+        self.core = SleepCore(
+            blink_threshold=blink_threshold,
+            gauge_max=gauge_max,
+            gauge_increase_rate=gauge_increase_rate,
+            gauge_decrease_rate=gauge_decrease_rate,
+            final_confirmation_time=final_confirmation_time,
+            start_time=time.time(),
+        )
 
         # --- MediaPipe結果保存用 ---
         self.latest_result = None
@@ -63,6 +69,10 @@ class SleepDetector:
         avg_blink = (left_blink + right_blink) / 2.0
         return left_blink, right_blink, avg_blink
 
+    @property
+    def sleep_gauge(self):
+        return self.core.gauge
+
     def process_result(self):
         """
         最新の検出結果を処理して睡眠状態を判定
@@ -70,61 +80,20 @@ class SleepDetector:
         Returns:
             tuple: (gauge_value, is_stage1_sleep, is_stage2_sleep, status)
         """
-        current_time = time.time()
-        delta_time = current_time - self.last_update_time
-        self.last_update_time = current_time
-
-        status = "Awake"
-        is_stage1_sleep = False
-        is_stage2_sleep = False
-
-        face_detected = self.latest_result is not None and self.latest_result.face_landmarks
-
-        eyes_are_closed = False
-        if face_detected:
-            _, _, avg_blink = self.get_eye_blink_values()
-            if avg_blink >= self.BLINK_THRESHOLD:
-                eyes_are_closed = True
-
-        if face_detected and eyes_are_closed:
-            # --- 目が閉じている場合：ゲージを増加 ---
-            self.sleep_gauge += self.GAUGE_INCREASE_RATE * delta_time
-            status = "Eyes Closed"
-        else:
-            # --- 目が開いている、または顔が検出されない場合：ゲージを減少 ---
-            self.sleep_gauge -= self.GAUGE_DECREASE_RATE * delta_time
-            if face_detected:
-                status = "Eyes Open"
-            else:
-                status = "No Face"
-
-        # ゲージの値を 0 と GAUGE_MAX の間に制限
-        self.sleep_gauge = max(0.0, min(self.sleep_gauge, self.GAUGE_MAX))
-
-        # --- Stage1 / Stage2 の判定 ---
-        is_stage1_sleep = (self.sleep_gauge >= self.GAUGE_MAX)
-
-        if is_stage1_sleep:
-            if self.final_confirmation_start_time is None:
-                self.final_confirmation_start_time = current_time
-
-            final_elapsed = current_time - self.final_confirmation_start_time
-            if final_elapsed >= self.FINAL_CONFIRMATION_TIME:
-                is_stage2_sleep = True
-                status = "Confirmed Sleep (Stage 2)"
-            else:
-                status = f"Final Confirmation ({final_elapsed:.1f}s)"
-        else:
-            # ゲージが最大値から減ったら、最終確認タイマーをリセット
-            self.final_confirmation_start_time = None
+        face_detected = bool(self.latest_result is not None and self.latest_result.face_landmarks)
+        left_blink, right_blink, _ = self.get_eye_blink_values()
 
-        return self.sleep_gauge, is_stage1_sleep, is_stage2_sleep, status
+        gauge, is_stage1_sleep, is_stage2_sleep, status, final_elapsed = self.core.step(
+            time.time(), face_detected, left_blink, right_blink
+        )
+        return gauge, is_stage1_sleep, is_stage2_sleep, format_status(status, final_elapsed)
 
 
 def main():
     """メイン処理"""
-    # シリアル通信の初期化
-    ser = Serialize_controler(port="COM8")
+    # シリアル通信の初期化（接続されている全M5Stickに通知する）
+    ser = DeviceHub()
+    ser.add_discovered()
 
     # 睡眠検出器の初期化
     detector = SleepDetector(
@@ -151,6 +120,7 @@ def main():
     cap = cv2.VideoCapture(0)
     if not cap.isOpened():
         print("Error: Could not open camera")
+        ser.close()
         return
 
     # 通知フラグ
@@ -177,25 +147,25 @@ def main():
             # 顔未検出時は即OFFを送信（status が "No Face"）
             if status == "No Face":
                 print(f"[{time.ctime()}] No face detected. Sending OFF to M5Stick...")
-                ser.send_to_m5("OFF")
+                ser.send("OFF")
                 time.sleep(1.0)  # 少し待機してから次へ
             else:
                 # --- M5Stickへの2段階通知処理 ---
                 if is_stage1 and not notified_stage1:
                     print(f"[{time.ctime()}] STAGE 1 DETECTED! Sending pre-signal to M5Stick...")
                     notified_stage1 = True
-                    ser.send_to_m5("ALERT")
+                    ser.send("ALERT")
 
                 if is_stage2 and not notified_stage2:
                     print(f"[{time.ctime()}] STAGE 2 CONFIRMED! Sending final signal to M5Stick...")
                     notified_stage2 = True
-                    ser.send_to_m5("OFF")
+                    ser.send("OFF")
 
                 if not is_stage1 and (notified_stage1 or notified_stage2):
                     print(f"[{time.ctime()}] User woke up. Resetting all notifications.")
                     notified_stage1 = False
                     notified_stage2 = False
-                    ser.send_to_m5("AWAKE")
+                    ser.send("AWAKE")
 
             # --- デバッグ用ウィンドウ表示 ---
             color = (0, 255, 0)
@@ -229,6 +199,7 @@ def main():
 
     cap.release()
     cv2.destroyAllWindows()
+    ser.close()
     print("\nProgram terminated.")
 
 
@@ -0,0 +1,238 @@
+"""
+睡眠ゲージ判定のコア処理
+
+MediaPipe と time.time() に依存しない純粋な判定ロジック。
+タイムスタンプと (顔の有無, 左目のblink値, 右目のblink値) を与えて状態を進める。
+
+- SleepCore      : 1台分の状態をスカラーで進める
+- SleepCoreBatch : 複数台分の独立した状態を NumPy でまとめて進める
+"""
+
+import numpy as np
+
+# --- ステータスコード ---
+EYES_OPEN = 0
+EYES_CLOSED = 1
+NO_FACE = 2
+FINAL_CONFIRMATION = 3
+CONFIRMED_SLEEP = 4
+
+
+def format_status(status, final_elapsed):
+    """ステータスコードを表示用の文字列に変換する"""
+    if status == CONFIRMED_SLEEP:
+        return "Confirmed Sleep (Stage 2)"
+    if status == FINAL_CONFIRMATION:
+        return f"Final Confirmation ({final_elapsed:.1f}s)"
+    if status == EYES_CLOSED:
+        return "Eyes Closed"
+    if status == NO_FACE:
+        return "No Face"
+    return "Eyes Open"
+
+
+class SleepCore:
+    """
+    1台分の睡眠ゲージ判定
+
+    step() はコンテナを確保せず、スロット上の状態だけを書き換える。
+    """
+
+    __slots__ = (
+        "blink_threshold", "gauge_max", "gauge_increase_rate",
+        "gauge_decrease_rate", "final_confirmation_time",
+        "gauge", "last_time", "confirmation_start",
+    )
+
+    def __init__(
+        self,
+        blink_threshold=0.5,
+        gauge_max=4.0,
+        gauge_increase_rate=1.0,
+        gauge_decrease_rate=1.5,
+        final_confirmation_time=3.0,
+        start_time=None,
+    ):
+        """
+        初期化
+
+        Args:
+            blink_threshold: 目が閉じていると判定するBlendshapeの閾値
+            gauge_max: 睡眠ゲージの最大値。この値に達すると睡眠(Stage1)と判定
+            gauge_increase_rate: ゲージの増加速度（ポイント/秒）
+            gauge_decrease_rate: ゲージの減少速度（ポイント/秒）
+            final_confirmation_time: Stage1検知後、Stage2まで待つ秒数
+            start_time: 経過時間の起点。None の場合は最初の step() を起点にする
+        """
+        self.blink_threshold = blink_threshold
+        self.gauge_max = gauge_max
+        self.gauge_increase_rate = gauge_increase_rate
+        self.gauge_decrease_rate = gauge_decrease_rate
+        self.final_confirmation_time = final_confirmation_time
+        self.reset(start_time)
+
+    def reset(self, start_time=None):
+        """状態を初期化する"""
+        self.gauge = 0.0
+        self.last_time = start_time
+        self.confirmation_start = None
+
+    def step(self, timestamp, face_present, left_blink, right_blink):
+        """
+        1ステップ進める
+
+        Returns:
+            tuple: (gauge_value, is_stage1_sleep, is_stage2_sleep, status, final_elapsed)
+        """
+        delta_time = 0.0 if self.last_time is None else timestamp - self.last_time
+        self.last_time = timestamp
+
+        eyes_are_closed = face_present and (left_blink + right_blink) / 2.0 >= self.blink_threshold
+
+        if eyes_are_closed:
+            gauge = self.gauge + self.gauge_increase_rate * delta_time
+            status = EYES_CLOSED
+        else:
+            gauge = self.gauge - self.gauge_decrease_rate * delta_time
+            status = EYES_OPEN if face_present else NO_FACE
+
+        # ゲージの値を 0 と gauge_max の間に制限
+        gauge = max(0.0, min(gauge, self.gauge_max))
+        self.gauge = gauge
+
+        is_stage1_sleep = gauge >= self.gauge_max
+        is_stage2_sleep = False
+        final_elapsed = 0.0
+
+        if is_stage1_sleep:
+            if self.confirmation_start is None:
+                self.confirmation_start = timestamp
+            final_elapsed = timestamp - self.confirmation_start
+            if final_elapsed >= self.final_confirmation_time:
+                is_stage2_sleep = True
+                status = CONFIRMED_SLEEP
+            else:
+                status = FINAL_CONFIRMATION
+        else:
+            # ゲージが最大値から減ったら、最終確認タイマーをリセット
+            self.confirmation_start = None
+
+        return gauge, is_stage1_sleep, is_stage2_sleep, status, final_elapsed
+
+
+class SleepCoreBatch:
+    """
+    複数台分の睡眠ゲージ判定を NumPy でまとめて進める
+
+    各要素は SleepCore と同じ規則で独立に更新される。
+    作業用配列は初期化時に確保し、step() 中は新しい配列を確保しない。
+    step() が返す配列は内部バッファなので、次の step() で上書きされる。
+    """
+
+    def __init__(
+        self,
+        size,
+        blink_threshold=0.5,
+        gauge_max=4.0,
+        gauge_increase_rate=1.0,
+        gauge_decrease_rate=1.5,
+        final_confirmation_time=3.0,
+    ):
+        """
+        初期化
+
+        Args:
+            size: 同時に扱う検出器の数（カメラ映像の数）
+            その他: SleepCore と同じ
+        """
+        self.size = size
+        self.blink_threshold = blink_threshold
+        self.gauge_max = gauge_max
+        self.gauge_increase_rate = gauge_increase_rate
+        self.gauge_decrease_rate = gauge_decrease_rate
+        self.final_confirmation_time = final_confirmation_time
+
+        # --- 状態 ---
+        self.gauge = np.zeros(size, dtype=np.float64)
+        self.last_time = np.full(size, np.nan)             # NaN: 未開始
+        self.confirmation_start = np.full(size, np.nan)    # NaN: 最終確認中でない
+
+        # --- 出力 ---
+        self.stage1 = np.zeros(size, dtype=bool)
+        self.stage2 = np.zeros(size, dtype=bool)
+        self.status = np.zeros(size, dtype=np.int8)
+        self.final_elapsed = np.zeros(size, dtype=np.float64)
+
+        # --- 作業用 ---
+        self._delta = np.empty(size, dtype=np.float64)
+        self._work = np.empty(size, dtype=np.float64)
+        self._face = np.empty(size, dtype=bool)
+        self._closed = np.empty(size, dtype=bool)
+        self._mask = np.empty(size, dtype=bool)
+
+    def reset(self, index=None):
+        """状態を初期化する（index を指定するとその要素だけ）"""
+        if index is None:
+            index = slice(None)
+        self.gauge[index] = 0.0
+        self.last_time[index] = np.nan
+        self.confirmation_start[index] = np.nan
+
+    def step(self, timestamp, face_present, left_blink, right_blink):
+        """
+        全要素を1ステップ進める
+
+        各引数はスカラー（全要素共通）または長さ size の配列。
+
+        Returns:
+            tuple: (gauge, stage1, stage2, status, final_elapsed) の配列
+        """
+        delta = self._delta
+        work = self._work
+        face = self._face
+        closed = self._closed
+        mask = self._mask
+
+        # 顔の有無を bool の作業用配列にそろえる
+        np.copyto(face, face_present, casting="unsafe")
+
+        # 経過時間（未開始の要素は 0）
+        np.subtract(timestamp, self.last_time, out=delta)
+        np.isnan(delta, out=mask)
+        np.copyto(delta, 0.0, where=mask)
+        np.copyto(self.last_time, timestamp)
+
+        # 目を閉じているか
+        np.add(left_blink, right_blink, out=work)
+        np.multiply(work, 0.5, out=work)
+        np.greater_equal(work, self.blink_threshold, out=closed)
+        np.logical_and(closed, face, out=closed)
+
+        # ゲージの増減と 0..gauge_max への制限
+        work.fill(-self.gauge_decrease_rate)
+        np.copyto(work, self.gauge_increase_rate, where=closed)
+        np.multiply(work, delta, out=work)
+        np.add(self.gauge, work, out=self.gauge)
+        np.clip(self.gauge, 0.0, self.gauge_max, out=self.gauge)
+
+        # Stage1 / Stage2 の判定
+        np.greater_equal(self.gauge, self.gauge_max, out=self.stage1)
+        np.isnan(self.confirmation_start, out=mask)
+        np.logical_and(mask, self.stage1, out=mask)
+        np.copyto(self.confirmation_start, timestamp, where=mask)
+        np.logical_not(self.stage1, out=mask)
+        np.copyto(self.confirmation_start, np.nan, where=mask)
+
+        np.subtract(timestamp, self.confirmation_start, out=self.final_elapsed)
+        np.copyto(self.final_elapsed, 0.0, where=mask)
+        np.greater_equal(self.final_elapsed, self.final_confirmation_time, out=self.stage2)
+        np.logical_and(self.stage2, self.stage1, out=self.stage2)
+
+        # ステータスコード（後に書いたものが優先）
+        self.status.fill(NO_FACE)
+        np.copyto(self.status, EYES_OPEN, where=face)
+        np.copyto(self.status, EYES_CLOSED, where=closed)
+        np.copyto(self.status, FINAL_CONFIRMATION, where=self.stage1)
+        np.copyto(self.status, CONFIRMED_SLEEP, where=self.stage2)
+
+        return self.gauge, self.stage1, self.stage2, self.status, self.final_elapsed
@@ -1,33 +1,15 @@
 import serial
-import serial.tools.list_ports
 import sys
+import os
 from datetime import datetime
 
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../utils"))
+from device_hub import find_m5stick_port
+
 # シリアルポート設定
-SERIAL_PORT = 'COM15'  # M5StickC Plus2のポート
+SERIAL_PORT = None  # M5StickC Plus2のポート（None で自動検出）
 BAUD_RATE = 115200
 
-def find_m5stick_port():
-    """M5StickC Plus2のポートを自動検出"""
-    ports = serial.tools.list_ports.comports()
-
-    # キーワードでM5StickC Plus2を検索
-    keywords = ['CP210', 'Silicon Labs', 'CH340', 'USB-SERIAL']
-
-    for port in ports:
-        description = str(port.description).lower()
-        manufacturer = str(port.manufacturer).lower() if port.manufacturer else ""
-
-        for keyword in keywords:
-            if keyword.lower() in description or keyword.lower() in manufacturer:
-                return port.device
-
-    # 見つからない場合は最初のポートを返す
-    if ports:
-        return ports[0].device
-
-    return None
-
 def main():
     global SERIAL_PORT
 
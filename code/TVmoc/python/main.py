@@ -26,7 +26,7 @@ import os
 import numpy as np
 
 sys.path.append('../..')
-from utils import serial_comm
+from utils.device_hub import DeviceHub
 
 try:
     import cv2
@@ -61,8 +61,9 @@ CHANNELS = {
 
 START_CHANNEL = 1
 
-# シリアル通信用インスタンス生成
-ser = serial_comm.Serialize_controler(port="COM8")
+# シリアル通信用インスタンス生成（接続されている全M5Stickから受信する）
+ser = DeviceHub()
+ser.add_discovered()
 
 def loop_play(channels: dict, start_channel: int = 1, speed: float = 1.0, window_name: str = "Video", fullscreen: bool = False):
     """Play among multiple channels.
@@ -188,13 +189,13 @@ def loop_play(channels: dict, start_channel: int = 1, speed: float = 1.0, window
         # print(ser.receive_from_m5())
         # tv_str = ser.receive_from_m5()
 
-        # serial からの入力を一度だけ受け取る
+        # 全デバイスから届いた入力を順に処理する
         try:
-            tv_str = ser.receive_from_m5()
+            messages = ser.poll()
         except Exception:
-            tv_str = None
+            messages = []
 
-        if tv_str:
+        for _, tv_str in messages:
             tv_str = tv_str.strip()
             # TV_POWER -> 0 キーと同等（黒画面トグル）
             if tv_str == "TV_POWER":
@@ -0,0 +1,355 @@
+import threading
+
+import serial
+import serial.tools.list_ports
+
+# ==== 設定 ====
+BAUD = 115200               # M5Stack側と一致させる
+TIMEOUT = 0                 # 受信はノンブロッキング
+WRITE_TIMEOUT = 0.05        # 送信の最大待ち時間（秒）。検出ループを長く止めない
+RECONNECT_INTERVAL = 2.0    # 切断されたデバイスの再接続間隔（秒）
+M5_KEYWORDS = ['CP210', 'Silicon Labs', 'CH340', 'USB-SERIAL']
+FALLBACK_PORT = "COM8"     # M5Stickが自動検出できなかった場合に使うポート
+# ===============
+
+_discovery_lock = threading.Lock()
+_discovery_cache = None
+
+
+class DeviceInfo:
+    """検出したM5Stickの識別情報"""
+
+    def __init__(self, port, serial_number=None, vid=None, pid=None, description=""):
+        self.port = port
+        self.serial_number = serial_number
+        self.vid = vid
+        self.pid = pid
+        self.description = description
+
+    def __repr__(self):
+        return f"DeviceInfo(port={self.port!r}, serial_number={self.serial_number!r})"
+
+
+def _is_m5stick(port):
+    description = str(port.description).lower()
+    manufacturer = str(port.manufacturer).lower() if port.manufacturer else ""
+    for keyword in M5_KEYWORDS:
+        if keyword.lower() in description or keyword.lower() in manufacturer:
+            return True
+    return False
+
+
+def discover_m5sticks(refresh=False):
+    """
+    接続されているM5Stickを列挙する
+
+    結果はキャッシュされ、refresh=True を指定したときだけポートを列挙し直す。
+
+    Returns:
+        list[DeviceInfo]: 検出したデバイス（ポート名順）
+    """
+    global _discovery_cache
+    with _discovery_lock:
+        if _discovery_cache is None or refresh:
+            ports = sorted(serial.tools.list_ports.comports(), key=lambda p: p.device)
+            _discovery_cache = [
+                DeviceInfo(p.device, p.serial_number, p.vid, p.pid, str(p.description))
+                for p in ports if _is_m5stick(p)
+            ]
+        return list(_discovery_cache)
+
+
+def find_m5stick_port(refresh=False):
+    """M5StickC Plus2のポートを自動検出（見つからない場合は最初のポート）"""
+    devices = discover_m5sticks(refresh=refresh)
+    if devices:
+        return devices[0].port
+
+    ports = serial.tools.list_ports.comports()
+    if ports:
+        return ports[0].device
+
+    return None
+
+
+class _Device:
+    def __init__(self, name, port, serial_number, discover=False):
+        self.name = name
+        self.port = port
+        self.serial_number = serial_number
+        self.discover = discover      # 未接続のあいだ自動検出で見つかったM5Stickに切り替える
+        self.error_logged = False     # 接続エラーは接続できるまで1回だけ表示する
+        self.ser = None
+        self.connecting = False       # どこかのスレッドがポートを開いている最中
+        self.resync = False           # 途中までしか送れなかった行が残っている
+
+
+class DeviceHub:
+    """
+    複数のM5Stickへの接続をまとめて管理するクラス
+
+    接続は開いたまま保持し、切断されたデバイスはバックグラウンドスレッドで
+    再接続するため、send() / receive() は検出ループをブロックしない
+    （send() の待ち時間は最大 WRITE_TIMEOUT 秒）。
+    """
+
+    def __init__(self, baud=BAUD, timeout=TIMEOUT, reconnect_interval=RECONNECT_INTERVAL):
+        self.baud = baud
+        self.timeout = timeout
+        self.reconnect_interval = reconnect_interval
+
+        self._devices = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._reconnect_thread = threading.Thread(target=self._reconnect_loop, daemon=True)
+        self._reconnect_thread.start()
+
+    def add(self, name, port=None, serial_number=None, discover=False):
+        """
+        デバイスを登録して接続する
+
+        Args:
+            name: 送信先として使う名前（部屋名やTV名など）
+            port: ポート名。省略時は serial_number から解決する
+            serial_number: USBシリアル番号。ポート名が変わっても同じ個体に再接続できる
+            discover: True の場合、接続できるまで再接続のたびに自動検出をやり直し、
+                他の名前で使われていないM5Stickが見つかればそちらに接続する
+        """
+        if port is None and serial_number is not None:
+            port = self._resolve_port(serial_number, refresh=False)
+
+        device = _Device(name, port, serial_number, discover)
+        with self._lock:
+            old = self._devices.get(name)
+            self._devices[name] = device
+        if old is not None:
+            self._close_device(old)
+
+        # 初回だけ同期で接続を試み、失敗したら再接続スレッドに任せる
+        self._connect(device)
+
+    def add_discovered(self, prefix="m5", fallback_port=FALLBACK_PORT):
+        """
+        自動検出したM5Stickをすべて登録する
+
+        Args:
+            prefix: 登録名の接頭辞
+            fallback_port: 1台も検出できなかったときに prefix の名前で登録するポート。
+                後から接続されたM5Stickは自動検出で見つけて切り替える。
+                None の場合は何も登録しない
+
+        Returns:
+            list[str]: 登録した名前（prefix_0, prefix_1, ... または prefix）
+        """
+        names = []
+        for i, info in enumerate(discover_m5sticks()):
+            name = f"{prefix}_{i}"
+            self.add(name, port=info.port, serial_number=info.serial_number)
+            names.append(name)
+
+        if not names and fallback_port is not None:
+            print(f"[自動検出失敗] {fallback_port} に接続します")
+            self.add(prefix, port=fallback_port, discover=True)
+            names.append(prefix)
+        return names
+
+    @property
+    def names(self):
+        with self._lock:
+            return list(self._devices)
+
+    def is_connected(self, name):
+        with self._lock:
+            device = self._devices.get(name)
+        return device is not None and device.ser is not None
+
+    def send(self, message: str, names=None):
+        """
+        メッセージを送信する
+
+        Args:
+            message: 送信する文字列
+            names: 送信先の名前（str またはそのリスト）。省略時は全デバイス
+
+        Returns:
+            list[str]: 送信できたデバイス名
+        """
+        sent = []
+        data = (message + "\n").encode()
+        for device in self._select(names):
+            ser = device.ser
+            if ser is None:
+                continue
+            # 前回の送信が途中で切れていたら、先に改行を送って断片を区切る
+            payload = b"\n" + data if device.resync else data
+            try:
+                written = ser.write(payload)
+            except serial.SerialTimeoutException:
+                written = None
+            except (serial.SerialException, OSError) as e:
+                print(f"[{device.name}] 送信エラー:", e)
+                self._mark_disconnected(device, ser)
+                continue
+
+            if written is not None and written == len(payload):
+                device.resync = False
+                print(f"[PC→{device.name}] 送信: {message}")
+                sent.append(device.name)
+            else:
+                device.resync = True
+                print(f"[{device.name}] 送信タイムアウトのため破棄: {message}")
+        return sent
+
+    def receive(self, name):
+        """指定したデバイスから1行だけ受信する（データがなければNone）"""
+        with self._lock:
+            device = self._devices.get(name)
+        if device is None or device.ser is None:
+            return None
+        ser = device.ser
+        try:
+            line = ser.readline().decode(errors="ignore").strip()
+        except (serial.SerialException, OSError) as e:
+            print(f"[{device.name}] 受信エラー:", e)
+            self._mark_disconnected(device, ser)
+            return None
+        if line:
+            print(f"[{device.name}→PC] 受信: {line}")
+            return line
+        return None
+
+    def poll(self):
+        """
+        全デバイスから1行ずつ受信する
+
+        Returns:
+            list[tuple[str, str]]: (デバイス名, 受信文字列) のリスト
+        """
+        results = []
+        for name in self.names:
+            line = self.receive(name)
+            if line:
+                results.append((name, line))
+        return results
+
+    def close(self):
+        """再接続スレッドを止めて全ポートを閉じる"""
+        self._stop_event.set()
+        self._reconnect_thread.join(timeout=self.reconnect_interval + 1.0)
+        with self._lock:
+            devices = list(self._devices.values())
+        for device in devices:
+            self._close_device(device)
+        print("[全シリアルポートを閉じました]")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---- 内部処理 ----
+
+    def _select(self, names):
+        with self._lock:
+            if names is None:
+                return list(self._devices.values())
+            if isinstance(names, str):
+                names = [names]
+            return [self._devices[n] for n in names if n in self._devices]
+
+    def _resolve_port(self, serial_number, refresh):
+        for info in discover_m5sticks(refresh=refresh):
+            if info.serial_number == serial_number:
+                return info.port
+        return None
+
+    def _connect(self, device):
+        # 同じデバイスを複数スレッドで同時に開かないよう、先に接続権を取る
+        with self._lock:
+            if device.ser is not None or device.connecting or device.port is None:
+                return False
+            device.connecting = True
+            port = device.port
+
+        try:
+            try:
+                ser = serial.Serial(port, self.baud, timeout=self.timeout,
+                                    write_timeout=WRITE_TIMEOUT)
+            except (serial.SerialException, OSError) as e:
+                if not device.error_logged:
+                    device.error_logged = True
+                    print(f"[{device.name}] 接続エラー:", e)
+                return False
+
+            with self._lock:
+                # 接続中に登録が差し替えられた場合は破棄する
+                if self._devices.get(device.name) is not device or self._stop_event.is_set():
+                    ser.close()
+                    return False
+                device.ser = ser
+                device.resync = False
+                device.discover = False
+                device.error_logged = False
+            print(f"[接続成功] {device.name}: {port} @ {self.baud}bps")
+            return True
+        finally:
+            with self._lock:
+                device.connecting = False
+
+    def _adopt_discovered(self, device):
+        """他の名前で使われていないM5Stickが検出されていれば、device をそちらに向ける"""
+        with self._lock:
+            others = [d for d in self._devices.values() if d is not device]
+            used_ports = {d.port for d in others}
+            used_serials = {d.serial_number for d in others if d.serial_number}
+            for info in discover_m5sticks():
+                if info.port in used_ports or info.serial_number in used_serials:
+                    continue
+                if info.port != device.port:
+                    device.port = info.port
+                    device.serial_number = info.serial_number
+                    device.error_logged = False
+                    print(f"[自動検出] {device.name}: {info.port}")
+                return
+
+    def _mark_disconnected(self, device, ser):
+        with self._lock:
+            if device.ser is not ser:
+                return
+            device.ser = None
+        try:
+            ser.close()
+        except Exception:
+            pass
+        print(f"[{device.name}] 切断されました。再接続を待機します")
+
+    def _close_device(self, device):
+        with self._lock:
+            ser, device.ser = device.ser, None
+        if ser is not None and ser.is_open:
+            ser.close()
+
+    def _reconnect_loop(self):
+        while not self._stop_event.wait(self.reconnect_interval):
+            with self._lock:
+                pending = [d for d in self._devices.values()
+                           if d.ser is None and not d.connecting]
+            if not pending:
+                continue
+
+            # 抜き差しでポート名が変わることがあるため、シリアル番号から引き直す
+            if any(d.serial_number or d.discover for d in pending):
+                discover_m5sticks(refresh=True)
+            for device in pending:
+                if self._stop_event.is_set():
+                    break
+                if device.discover:
+                    self._adopt_discovered(device)
+                elif device.serial_number:
+                    port = self._resolve_port(device.serial_number, refresh=False)
+                    if port is None:
+                        continue
+                    with self._lock:
+                        device.port = port
+                self._connect(device)
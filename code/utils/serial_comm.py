@@ -1,15 +1,33 @@
 import serial
 import time
 
+try:
+    from .device_hub import find_m5stick_port
+except ImportError:
+    from device_hub import find_m5stick_port
+
 # ==== 設定 ====
-PORT = "COM6"       # デバイスマネージャーで確認
+PORT = None         # None の場合は M5Stick を自動検出（device_hub.find_m5stick_port）
 BAUD = 115200       # M5Stack側と一致させる
 TIMEOUT = 0
 # ===============
 
 class Serialize_controler:
+    """
+    1台のM5Stickとだけ通信する簡易クラス
+
+    複数台の管理や再接続が必要な場合は device_hub.DeviceHub を使う。
+    """
+
     def __init__(self, port=PORT, baud=BAUD, timeout=TIMEOUT):
-        """シリアルポートを開く"""
+        """シリアルポートを開く（port が None なら自動検出する）"""
+        if port is None:
+            port = find_m5stick_port()
+            if port is None:
+                print("接続エラー: シリアルポートが見つかりませんでした")
+                self.ser = None
+                return
+            print(f"[自動検出] {port}")
         try:
             self.ser = serial.Serial(port, baud, timeout=timeout)
             print(f"[接続成功] {port} @ {baud}bps")